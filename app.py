@@ -1,9 +1,66 @@
 import streamlit as st
 import os
-from datetime import datetime, timedelta
+import jinja2
+from datetime import datetime, timedelta, date
 from github_utils import fetch_github_activity
-from ollama_generator import generate_post_with_ollama, call_ollama
-import traceback
+from ollama_generator import generate_post_with_ollama_stream, clean_generated_post, call_ollama, preload_model
+
+# Project-card templates, compiled once at import instead of re-built as
+# f-strings per repo per rerun. autoescape also keeps repo descriptions
+# from injecting HTML into the unsafe_allow_html markdown below.
+_JINJA_ENV = jinja2.Environment(autoescape=True)
+
+_SPOTLIGHT_CARD_TMPL = _JINJA_ENV.from_string("""
+<div class="spotlight-card">
+    <h4>{{ item.repo }}</h4>
+    <p><strong>Description:</strong> {{ item.description or 'No description' }}</p>
+    <p><strong>Language:</strong> {{ item.language or 'Not specified' }}</p>
+    <p><strong>Stars:</strong> {{ item.stars }} ⭐</p>
+    <p><strong>Commits:</strong> {{ item.commits_count }}</p>
+    <p><strong>Recent commits:</strong></p>
+    <ul>{% for commit in item.commits[:3] %}<li>{{ commit }}</li>{% endfor %}</ul>
+    <p><strong>URL:</strong> <a href="{{ item.url }}" target="_blank">{{ item.url }}</a></p>
+</div>
+""")
+
+_PROJECT_CARD_TMPL = _JINJA_ENV.from_string("""
+<div class="project-card">
+    <h4>{{ item.repo }}</h4>
+    <p><strong>Description:</strong> {{ item.description or 'No description' }}</p>
+    <p><strong>Language:</strong> {{ item.language or 'Not specified' }}</p>
+    <p><strong>Stars:</strong> {{ item.stars }} ⭐</p>
+    <p><strong>Commits:</strong> {{ item.commits_count }}</p>
+    <p><strong>URL:</strong> <a href="{{ item.url }}" target="_blank">{{ item.url }}</a></p>
+</div>
+""")
+
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner="Fetching GitHub activity...")
+def _fetch_activity_memory(username, start_iso, end_iso):
+    """In-memory cached fetch for windows that are still accumulating commits"""
+    return fetch_github_activity(username, date.fromisoformat(start_iso), date.fromisoformat(end_iso))
+
+
+@st.cache_data(ttl=86400, persist="disk", max_entries=512, show_spinner="Fetching GitHub activity...")
+def _fetch_activity_disk(username, start_iso, end_iso):
+    """Disk-persisted cached fetch for closed windows (survives restarts)"""
+    return fetch_github_activity(username, date.fromisoformat(start_iso), date.fromisoformat(end_iso))
+
+
+def cached_fetch_github_activity(username, start_iso, end_iso):
+    """Cached wrapper around fetch_github_activity.
+
+    Streamlit re-runs the whole script on every widget interaction, so without
+    caching each rerun re-hits the GitHub API. Dates are passed as ISO strings
+    so cache keys are stable regardless of date vs datetime callers.
+
+    Fully-past windows can't gain new commits, so they persist to disk and
+    survive process restarts; windows that include today stay in-memory with
+    a short TTL so fresh pushes still show up.
+    """
+    if date.fromisoformat(end_iso) < date.today():
+        return _fetch_activity_disk(username, start_iso, end_iso)
+    return _fetch_activity_memory(username, start_iso, end_iso)
 
 # Page configuration
 st.set_page_config(
@@ -13,8 +70,11 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS for better styling
-st.markdown("""
+# Custom CSS for better styling — cached so the string identity is stable
+# across reruns and Streamlit's element diff can short-circuit
+@st.cache_data
+def _page_css():
+    return """
 <style>
     .main-header {
         text-align: center;
@@ -69,7 +129,9 @@ st.markdown("""
         border-left: 3px solid #9c27b0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_page_css(), unsafe_allow_html=True)
 
 # Header
 st.markdown("""
@@ -79,15 +141,19 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Initialize session state
-if 'github_data' not in st.session_state:
-    st.session_state.github_data = None
+# Initialize session state. Only the (username, start, end) query is kept
+# per session — the activity data itself lives in the st.cache_data layer
+# and is re-derived on each rerun for the cost of a cache lookup.
+if 'query' not in st.session_state:
+    st.session_state.query = None
 if 'generated_post' not in st.session_state:
     st.session_state.generated_post = None
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 if 'spotlight_projects' not in st.session_state:
     st.session_state.spotlight_projects = []
+if 'pending_refinements' not in st.session_state:
+    st.session_state.pending_refinements = []
 
 # Sidebar for instructions
 with st.sidebar:
@@ -148,11 +214,13 @@ with col1:
         else:
             with st.spinner("Fetching GitHub activity..."):
                 try:
-                    github_data = fetch_github_activity(username, start_date, end_date)
+                    github_data = cached_fetch_github_activity(username, start_date.isoformat(), end_date.isoformat())
                     if github_data:
-                        st.session_state.github_data = github_data
+                        st.session_state.query = (username, start_date.isoformat(), end_date.isoformat())
                         st.session_state.generated_post = None  # Reset post when new data is fetched
                         st.session_state.chat_history = []  # Reset chat history
+                        # Warm the model while the user picks spotlight projects
+                        preload_model()
                         st.success(f"Found {len(github_data)} repositories with activity!")
                     else:
                         st.warning("No repositories found with activity in the specified date range")
@@ -163,111 +231,87 @@ with col1:
 with col2:
     st.markdown("### 🎯 Project Selection & Post Generation")
     
-    if st.session_state.github_data:
-        # Project selection
-        repo_options = []
-        for item in st.session_state.github_data:
-            repo = item['repo']
-            commits_count = len(item['commits'])
-            repo_display = f"**{repo}** ({commits_count} commits)"
-            repo_options.append((repo_display, repo))
-        
-        spotlight_projects = st.multiselect(
+    if st.session_state.query:
+        # Effectively free after the first call thanks to st.cache_data —
+        # but TTL expiry or eviction means this can re-hit GitHub, so
+        # degrade to the pre-fetch state if the refetch fails
+        try:
+            github_data = cached_fetch_github_activity(*st.session_state.query)
+        except Exception as e:
+            st.session_state.query = None
+            st.session_state.generated_post = None
+            st.error(f"Error refreshing GitHub data: {str(e)}")
+            st.error("Use 'Fetch GitHub Activity' to try again")
+            github_data = []
+
+        # Index once so later passes are dict lookups, not scans
+        by_repo = {item['repo']: item for item in github_data}
+        repo_order = [item['repo'] for item in github_data]
+
+        # Project selection — options are the repo names themselves and
+        # format_func handles display, so no reverse lookup is needed
+        commit_counts = {repo: by_repo[repo]['commits_count'] for repo in repo_order}
+
+        spotlight_repo_names = st.multiselect(
             "🌟 Select Spotlight Projects (2-3 recommended)",
-            options=[option[0] for option in repo_options],
+            options=repo_order,
+            format_func=lambda repo: f"**{repo}** ({commit_counts[repo]} commits)",
             help="These will be featured prominently in your LinkedIn post"
         )
-        
-        # Convert display names back to repo names
-        spotlight_repo_names = []
-        for display_name in spotlight_projects:
-            for display, repo_name in repo_options:
-                if display == display_name:
-                    spotlight_repo_names.append(repo_name)
-                    break
-        
         st.session_state.spotlight_projects = spotlight_repo_names
+
+        # Split spotlight vs other once; both generation and the details
+        # section below reuse these lists
+        spotlight_set = set(spotlight_repo_names)
+        spotlight_data = [by_repo[repo] for repo in repo_order if repo in spotlight_set]
+        other_data = [by_repo[repo] for repo in repo_order if repo not in spotlight_set]
         
         # Generate post button
         if st.button("🤖 Generate LinkedIn Post", disabled=len(spotlight_repo_names) == 0):
             if not spotlight_repo_names:
                 st.error("Please select at least one spotlight project")
             else:
-                with st.spinner("Generating LinkedIn post with AI..."):
-                    try:
-                        # Prepare data for LLM
-                        spotlight_data = []
-                        other_data = []
-                        
-                        for item in st.session_state.github_data:
-                            if item['repo'] in spotlight_repo_names:
-                                spotlight_data.append(item)
-                            else:
-                                other_data.append(item)
-                        
-                        # Generate the post
-                        generated_post = generate_post_with_ollama(
-                            spotlight_data, 
-                            other_data, 
-                            start_date, 
-                            end_date
-                        )
-                        
-                        if generated_post:
-                            st.session_state.generated_post = generated_post
-                            st.session_state.chat_history = []  # Reset chat history for new post
-                            st.markdown("""
-                            <div class="success-message">
-                                ✅ LinkedIn post generated successfully!
-                            </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.error("Failed to generate post. Make sure Ollama is running.")
-                    
-                    except Exception as e:
-                        st.error(f"Error generating post: {str(e)}")
-                        st.error("Make sure Ollama is installed and running locally")
+                try:
+                    # Stream the post as it generates so the first tokens
+                    # appear in ~a second instead of after the full run
+                    raw_output = st.write_stream(generate_post_with_ollama_stream(
+                        spotlight_data,
+                        other_data,
+                        start_date,
+                        end_date
+                    ))
+                    generated_post = clean_generated_post(raw_output) if raw_output else None
+
+                    if generated_post:
+                        st.session_state.generated_post = generated_post
+                        st.session_state.chat_history = []  # Reset chat history for new post
+                        st.markdown("""
+                        <div class="success-message">
+                            ✅ LinkedIn post generated successfully!
+                        </div>
+                        """, unsafe_allow_html=True)
+                    else:
+                        st.error("Failed to generate post. Make sure Ollama is running.")
+
+                except Exception as e:
+                    st.error(f"Error generating post: {str(e)}")
+                    st.error("Make sure Ollama is installed and running locally")
 
 # Project Details Section
-if st.session_state.github_data:
+if st.session_state.query:
     st.markdown("---")
     st.markdown("### 📂 Project Details")
-    
-    # Separate projects into spotlight and non-spotlight
-    spotlight_data = []
-    other_data = []
-    
-    for item in st.session_state.github_data:
-        if item['repo'] in st.session_state.spotlight_projects:
-            spotlight_data.append(item)
-        else:
-            other_data.append(item)
-    
+
+    # spotlight_data / other_data were already split above
     col_spotlight, col_other = st.columns([1, 1])
     
     with col_spotlight:
         with st.expander(f"🌟 Spotlight Projects ({len(spotlight_data)})", expanded=True):
             if spotlight_data:
                 for item in spotlight_data:
-                    st.markdown(f"""
-                    <div class="spotlight-card">
-                        <h4>{item['repo']}</h4>
-                        <p><strong>Description:</strong> {item.get('description', 'No description')}</p>
-                        <p><strong>Language:</strong> {item.get('language', 'Not specified')}</p>
-                        <p><strong>Stars:</strong> {item.get('stars', 0)} ⭐</p>
-                        <p><strong>Commits:</strong> {len(item['commits'])}</p>
-                        <p><strong>Recent commits:</strong></p>
-                        <ul>
-                    """, unsafe_allow_html=True)
-                    
-                    for commit in item['commits'][:3]:
-                        st.markdown(f"<li>{commit}</li>", unsafe_allow_html=True)
-                    
-                    st.markdown(f"""
-                        </ul>
-                        <p><strong>URL:</strong> <a href="{item['url']}" target="_blank">{item['url']}</a></p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    # One st.markdown per card: each call is a separate
+                    # websocket message, so the whole card renders as one blob
+                    st.markdown(_SPOTLIGHT_CARD_TMPL.render(item=item), unsafe_allow_html=True)
             else:
                 st.info("No spotlight projects selected")
     
@@ -275,45 +319,19 @@ if st.session_state.github_data:
         with st.expander(f"📁 Other Projects ({len(other_data)})", expanded=False):
             if other_data:
                 for item in other_data:
-                    st.markdown(f"""
-                    <div class="project-card">
-                        <h4>{item['repo']}</h4>
-                        <p><strong>Description:</strong> {item.get('description', 'No description')}</p>
-                        <p><strong>Language:</strong> {item.get('language', 'Not specified')}</p>
-                        <p><strong>Stars:</strong> {item.get('stars', 0)} ⭐</p>
-                        <p><strong>Commits:</strong> {len(item['commits'])}</p>
-                        <p><strong>URL:</strong> <a href="{item['url']}" target="_blank">{item['url']}</a></p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(_PROJECT_CARD_TMPL.render(item=item), unsafe_allow_html=True)
             else:
                 st.info("All projects are in spotlight")
 
-# Generated post display and chat interface
+# Generated post display and chat interface. The chat column is processed
+# first so its state mutations land before the post is rendered — no
+# explicit st.rerun() (a full duplicate script pass) is needed.
 if st.session_state.generated_post:
     st.markdown("---")
     st.markdown("### 📝 Generated LinkedIn Post")
-    
+
     col_post, col_chat = st.columns([2, 1])
-    
-    with col_post:
-        st.text_area(
-            "Your LinkedIn Post",
-            st.session_state.generated_post,
-            height=300,
-            help="Copy this content to your LinkedIn post"
-        )
-        
-        # Post metrics
-        char_count = len(st.session_state.generated_post)
-        st.metric("Character Count", char_count)
-        
-        if char_count > 3000:
-            st.warning("⚠️ Post is quite long. Consider shortening for better engagement.")
-        elif char_count > 1300:
-            st.success("✅ Good length for LinkedIn!")
-        else:
-            st.info("ℹ️ Post is on the shorter side")
-    
+
     with col_chat:
         st.markdown("#### 💬 Chat with AI")
         st.markdown("Refine your post by chatting with the AI")
@@ -324,38 +342,76 @@ if st.session_state.generated_post:
             placeholder="e.g., Make it more casual, add more emojis, shorten it...",
             key="chat_input"
         )
-        
-        if st.button("💬 Send Message") and user_message:
-            # Add user message to chat history
+
+        col_queue, col_apply = st.columns(2)
+        with col_queue:
+            queue_clicked = st.button("➕ Queue Refinement")
+
+        if queue_clicked and user_message:
+            # Buffer the request so several refinements can share one LLM call
+            st.session_state.pending_refinements.append(user_message)
             st.session_state.chat_history.append({"role": "user", "content": user_message})
-            
-            with st.spinner("AI is thinking..."):
-                try:
-                    # Create a prompt for refining the post
-                    refine_prompt = f"""You are helping refine a LinkedIn post. Here's the current post:
+
+        # Rendered after the queue handler so the count includes this
+        # interaction; the explicit key keeps the widget ID stable while
+        # the label changes, so clicks aren't dropped across label updates
+        with col_apply:
+            apply_clicked = st.button(
+                f"💬 Apply ({len(st.session_state.pending_refinements)} queued)",
+                key="apply_refinements"
+            )
+
+        if apply_clicked:
+            # Include whatever is still in the input box
+            if user_message and user_message not in st.session_state.pending_refinements:
+                st.session_state.pending_refinements.append(user_message)
+                st.session_state.chat_history.append({"role": "user", "content": user_message})
+
+            pending = st.session_state.pending_refinements
+            if not pending:
+                st.error("Queue a refinement first")
+            else:
+                with st.spinner("AI is thinking..."):
+                    try:
+                        # One batched prompt: the post and instructions are
+                        # encoded once for all queued refinements instead of
+                        # one full generation per chat turn
+                        numbered = '\n'.join(f"[{i}] {msg}" for i, msg in enumerate(pending, 1))
+                        refine_prompt = f"""You are helping refine a LinkedIn post. Here's the current post:
 
 {st.session_state.generated_post}
 
-The user wants this change: {user_message}
-
-Please provide the updated LinkedIn post that incorporates their feedback. Return ONLY the updated post, no explanations or additional text."""
-                    
-                    # Get AI response
-                    ai_response = call_ollama(refine_prompt)
-                    
-                    if ai_response:
-                        # Update the generated post
-                        st.session_state.generated_post = ai_response.strip()
-                        # Add AI response to chat history
-                        st.session_state.chat_history.append({"role": "ai", "content": "Post updated successfully!"})
-                        st.rerun()
-                    else:
-                        st.error("Failed to get AI response")
-                        
-                except Exception as e:
-                    st.error(f"Error communicating with AI: {str(e)}")
-        
-        # Display chat history
+Apply ALL of the following changes to the post:
+{numbered}
+
+Please provide the updated LinkedIn post that incorporates every change. Return ONLY the updated post, no explanations or additional text."""
+
+                        # Get AI response
+                        ai_response = call_ollama(refine_prompt)
+
+                        if ai_response:
+                            # Update the generated post
+                            st.session_state.generated_post = ai_response.strip()
+                            st.session_state.pending_refinements = []
+                            # Add AI response to chat history
+                            st.session_state.chat_history.append({"role": "ai", "content": f"Post updated with {len(pending)} refinement(s)!"})
+                        else:
+                            st.error("Failed to get AI response")
+
+                    except Exception as e:
+                        st.error(f"Error communicating with AI: {str(e)}")
+
+        # Clear chat button
+        if st.button("🗑️ Clear Chat"):
+            st.session_state.chat_history = []
+
+        # Regenerate button
+        if st.button("🔄 Regenerate Post"):
+            st.session_state.generated_post = None
+            st.session_state.chat_history = []
+
+        # Display chat history (after the buttons so it reflects this
+        # interaction's mutations without a second script pass)
         if st.session_state.chat_history:
             st.markdown("#### 💭 Chat History")
             for i, message in enumerate(st.session_state.chat_history[-5:]):  # Show last 5 messages
@@ -371,17 +427,28 @@ Please provide the updated LinkedIn post that incorporates their feedback. Retur
                         <strong>AI:</strong> {message["content"]}
                     </div>
                     """, unsafe_allow_html=True)
-        
-        # Clear chat button
-        if st.button("🗑️ Clear Chat"):
-            st.session_state.chat_history = []
-            st.rerun()
-        
-        # Regenerate button
-        if st.button("🔄 Regenerate Post"):
-            st.session_state.generated_post = None
-            st.session_state.chat_history = []
-            st.rerun()
+
+    with col_post:
+        # Rendered after the chat handlers so the freshest post is shown
+        # (and nothing is shown at all right after a regenerate request)
+        if st.session_state.generated_post:
+            st.text_area(
+                "Your LinkedIn Post",
+                st.session_state.generated_post,
+                height=300,
+                help="Copy this content to your LinkedIn post"
+            )
+
+            # Post metrics
+            char_count = len(st.session_state.generated_post)
+            st.metric("Character Count", char_count)
+
+            if char_count > 3000:
+                st.warning("⚠️ Post is quite long. Consider shortening for better engagement.")
+            elif char_count > 1300:
+                st.success("✅ Good length for LinkedIn!")
+            else:
+                st.info("ℹ️ Post is on the shorter side")
 
 # Footer
 st.markdown("---")
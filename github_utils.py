@@ -1,217 +1,760 @@
+import asyncio
+import itertools
+import json
 import os
+import re
+import sqlite3
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from dotenv import load_dotenv
-import traceback
+from functools import lru_cache
+from urllib.parse import urlencode
 
-# Load environment variables
-load_dotenv()
+try:
+    import httpx
+except ImportError:
+    # httpx is optional — without it the REST path falls back to threads
+    httpx = None
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    # orjson is optional — stdlib json is a drop-in (slower) fallback
+    _loads = json.loads
+
+@lru_cache(maxsize=1)
+def _load_env():
+    """Load .env at most once, on first use rather than at import
+
+    Keeps importing this module free of filesystem I/O (helps cold start
+    and lets tests stub the environment without a .env stat).
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    return True
 
 class GitHubAPIError(Exception):
     """Custom exception for GitHub API errors"""
     pass
 
+# Shared HTTP session: one connection pool per process, so every request
+# after the first reuses a warm keep-alive connection instead of paying a
+# fresh TCP+TLS handshake
+_session_instance = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Return the process-wide requests.Session"""
+    global _session_instance
+    if _session_instance is None:
+        with _session_lock:
+            if _session_instance is None:
+                session = requests.Session()
+                # Pool sized for the thread fan-out, with retries on the
+                # transient gateway errors GitHub occasionally returns
+                adapter = HTTPAdapter(
+                    pool_connections=20,
+                    pool_maxsize=20,
+                    max_retries=Retry(total=3, backoff_factor=0.3,
+                                      status_forcelist=[502, 503, 504])
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                # Common headers live on the session; per-call headers
+                # (e.g. the GraphQL bearer token) still override them
+                session.headers.update({
+                    'Accept': 'application/vnd.github.v3+json',
+                    'User-Agent': 'GitHub-LinkedIn-Generator'
+                })
+                _session_instance = session
+    return _session_instance
+
+@lru_cache(maxsize=1)
+def _token_pool():
+    """Build the round-robin token cycle from the environment
+
+    GITHUB_PATS holds a comma-separated list of tokens; each gets its own
+    5000 req/hour primary quota, so rotating per request multiplies the
+    effective rate limit by the pool size. Falls back to the single
+    GITHUB_PAT. next() on a cycle is atomic under the GIL, so worker
+    threads can share it without a lock.
+    """
+    _load_env()
+    raw = os.getenv('GITHUB_PATS', os.getenv('GITHUB_PAT', ''))
+    tokens = [token.strip() for token in raw.split(',') if token.strip()]
+    if not tokens:
+        raise GitHubAPIError("GITHUB_PAT not found in environment variables. Please check your .env file.")
+    return itertools.cycle(tokens)
+
 def get_github_headers():
     """Get headers for GitHub API requests"""
-    token = os.getenv('GITHUB_PAT')
-    if not token:
-        raise GitHubAPIError("GITHUB_PAT not found in environment variables. Please check your .env file.")
-    
     return {
-        'Authorization': f'token {token}',
+        'Authorization': f'token {next(_token_pool())}',
         'Accept': 'application/vnd.github.v3+json',
         'User-Agent': 'GitHub-LinkedIn-Generator'
     }
 
-def fetch_user_repos(username):
-    """Fetch all repositories for a given username"""
+# Rate-limit bookkeeping, updated from every response's X-RateLimit-*
+# headers and shared across worker threads. Each token has its own quota,
+# so remaining/reset are tracked per token — one exhausted token must not
+# be masked by (or mask) a healthy one in the pool. When a token's
+# remaining quota dips below the threshold, its requests are spread out
+# over the reset window so a parallel scan degrades to a sustainable rate
+# instead of tripping the limit.
+_rate_lock = threading.Lock()
+_rate_limits = {}  # token -> (remaining, reset_at)
+_RATE_THRESHOLD = 50
+
+def _auth_token(headers):
+    """Token a request is authorized with, for per-token rate bookkeeping"""
+    return (headers or {}).get('Authorization', '').split(' ')[-1]
+
+def _update_rate_limit(response, token):
+    try:
+        remaining = int(response.headers.get('X-RateLimit-Remaining'))
+        reset_at = float(response.headers.get('X-RateLimit-Reset'))
+    except (TypeError, ValueError):
+        return
+    with _rate_lock:
+        _rate_limits[token] = (remaining, reset_at)
+
+def _throttle_delay(token):
+    """Seconds to wait before this token's next request to stay under its limit"""
+    with _rate_lock:
+        remaining, reset_at = _rate_limits.get(token, (None, 0.0))
+    if remaining is None or remaining >= _RATE_THRESHOLD:
+        return 0.0
+    window = max(0.0, reset_at - time.time())
+    if remaining <= 0:
+        return min(window, 60.0)
+    return min(window / remaining, 5.0)
+
+def _retry_after_seconds(response):
+    """Honor Retry-After on secondary-rate-limit responses (403/429)"""
+    if response.status_code not in (403, 429):
+        return None
+    retry_after = response.headers.get('Retry-After')
+    if not retry_after:
+        return None
+    try:
+        return min(int(retry_after), 120)
+    except ValueError:
+        return None
+
+# ETag cache: GitHub replays If-None-Match requests as free 304s (no body,
+# no primary rate-limit cost), so unchanged payloads are served from disk
+_ETAG_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'git-post', 'etags.sqlite')
+_etag_local = threading.local()
+_etag_schema_lock = threading.Lock()
+_etag_schema_ready = False
+
+def _etag_db():
+    """Per-thread connection to the ETag cache
+
+    Connections are opened once per worker thread and reused — a fresh
+    connection plus schema setup per GET would serialize the fan-out
+    behind sqlite housekeeping. The schema is created (and old caches
+    migrated) once per process, on the first connection.
+    """
+    db = getattr(_etag_local, 'db', None)
+    if db is None:
+        global _etag_schema_ready
+        os.makedirs(os.path.dirname(_ETAG_CACHE_PATH), exist_ok=True)
+        db = sqlite3.connect(_ETAG_CACHE_PATH)
+        with _etag_schema_lock:
+            if not _etag_schema_ready:
+                db.execute('CREATE TABLE IF NOT EXISTS etags (key TEXT PRIMARY KEY, etag TEXT, body TEXT, link TEXT)')
+                try:
+                    # Migrate caches created before the link column existed
+                    db.execute('ALTER TABLE etags ADD COLUMN link TEXT')
+                except sqlite3.OperationalError:
+                    pass
+                _etag_schema_ready = True
+        _etag_local.db = db
+    return db
+
+def _etag_lookup(key):
+    """Return (etag, body, link) for a cached URL, or None"""
+    try:
+        return _etag_db().execute('SELECT etag, body, link FROM etags WHERE key = ?', (key,)).fetchone()
+    except sqlite3.Error:
+        return None
+
+def _etag_store(key, etag, body, link=None):
+    try:
+        db = _etag_db()
+        db.execute('INSERT OR REPLACE INTO etags (key, etag, body, link) VALUES (?, ?, ?, ?)',
+                   (key, etag, body, link))
+        db.commit()
+    except sqlite3.Error:
+        pass  # cache misses are harmless; never fail a fetch over the cache
+
+def _cache_key(url, params=None):
+    return url + ('?' + urlencode(sorted(params.items())) if params else '')
+
+class _CachedResponse:
+    """Minimal stand-in for a Response replayed from the ETag cache"""
+    status_code = 200
+
+    def __init__(self, body, link=None):
+        self.text = body
+        self.content = body.encode('utf-8')
+        # Link is the only response header callers read (pagination)
+        self.headers = {'Link': link} if link else {}
+
+    def json(self):
+        return _loads(self.content)
+
+def cached_get(url, headers, params=None):
+    """GET with ETag conditional-request caching
+
+    Sends If-None-Match when an ETag is cached for the URL; on 304 the
+    cached body (and Link header) is replayed, on 200 the fresh ETag and
+    body are stored.
+    """
+    key = _cache_key(url, params)
+    cached = _etag_lookup(key)
+
+    request_headers = dict(headers)
+    if cached:
+        request_headers['If-None-Match'] = cached[0]
+
+    token = _auth_token(request_headers)
+    delay = _throttle_delay(token)
+    if delay:
+        time.sleep(delay)
+
+    response = get_session().get(url, headers=request_headers, params=params)
+    _update_rate_limit(response, token)
+
+    # Secondary rate limit: sleep out the advertised Retry-After and retry once
+    retry_after = _retry_after_seconds(response)
+    if retry_after is not None:
+        time.sleep(retry_after)
+        response = get_session().get(url, headers=request_headers, params=params)
+        _update_rate_limit(response, token)
+
+    if response.status_code == 304 and cached:
+        return _CachedResponse(cached[1], cached[2])
+    if response.status_code == 200 and response.headers.get('ETag'):
+        _etag_store(key, response.headers['ETag'], response.text, response.headers.get('Link'))
+
+    return response
+
+async def _cached_get_async(client, path, params=None, headers=None):
+    """Async counterpart of cached_get for the httpx client"""
+    key = _cache_key('https://api.github.com' + path, params)
+    cached = _etag_lookup(key)
+
+    headers = dict(headers) if headers else {}
+    if cached:
+        headers['If-None-Match'] = cached[0]
+
+    # The auth header lives on the client, not the per-request headers
+    token = _auth_token(client.headers)
+    delay = _throttle_delay(token)
+    if delay:
+        await asyncio.sleep(delay)
+
+    response = await client.get(path, params=params, headers=headers)
+    _update_rate_limit(response, token)
+
+    # Secondary rate limit: sleep out the advertised Retry-After and retry once
+    retry_after = _retry_after_seconds(response)
+    if retry_after is not None:
+        await asyncio.sleep(retry_after)
+        response = await client.get(path, params=params, headers=headers)
+        _update_rate_limit(response, token)
+
+    if response.status_code == 304 and cached:
+        return _CachedResponse(cached[1], cached[2])
+    if response.status_code == 200 and response.headers.get('ETag'):
+        _etag_store(key, response.headers['ETag'], response.text, response.headers.get('Link'))
+
+    return response
+
+# Matches the page number of the rel="last" entry in GitHub's Link header
+_LINK_LAST_RE = re.compile(r'[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+def iter_user_repos(username, since_iso=None):
+    """Yield repositories for a given username, page by page
+
+    Page 1's repos are yielded as soon as they arrive, so downstream
+    per-repo fetches can start while the remaining pages (fetched
+    concurrently) are still in flight.
+
+    Pages come back sorted by pushed_at descending — the same field the
+    date filter checks (updated_at can lag pushed_at by months, so it
+    cannot soundly bound push activity). When since_iso is given,
+    pagination stops as soon as a page's oldest repo was pushed before
+    it — later pages can't contain anything newer.
+    """
     headers = get_github_headers()
-    repos = []
-    page = 1
+    url = f'https://api.github.com/users/{username}/repos'
     per_page = 100
-    
-    while True:
-        url = f'https://api.github.com/users/{username}/repos'
+
+    def get_page(page):
         params = {
             'per_page': per_page,
             'page': page,
-            'sort': 'updated',
+            'sort': 'pushed',
             'type': 'all'
         }
-        
-        response = requests.get(url, headers=headers, params=params)
-        
-        if response.status_code == 404:
-            raise GitHubAPIError(f"User '{username}' not found on GitHub")
-        elif response.status_code == 403:
-            raise GitHubAPIError("GitHub API rate limit exceeded or token invalid")
-        elif response.status_code != 200:
-            raise GitHubAPIError(f"GitHub API error: {response.status_code} - {response.text}")
-        
-        page_repos = response.json()
-        if not page_repos:
-            break
-            
-        repos.extend(page_repos)
-        page += 1
-        
-        # Limit to prevent excessive API calls
-        if len(repos) >= 300:
-            break
-    
-    return repos
+        return cached_get(url, headers, params=params)
+
+    response = get_page(1)
+
+    if response.status_code == 404:
+        raise GitHubAPIError(f"User '{username}' not found on GitHub")
+    elif response.status_code == 403:
+        raise GitHubAPIError("GitHub API rate limit exceeded or token invalid")
+    elif response.status_code != 200:
+        raise GitHubAPIError(f"GitHub API error: {response.status_code} - {response.text}")
+
+    # The Link header tells us the total page count up front, so instead of
+    # walking pages one blocking request at a time, fetch the remaining
+    # pages concurrently. Capped at 3 pages (the previous 300-repo limit).
+    last_page = 1
+    match = _LINK_LAST_RE.search(response.headers.get('Link', ''))
+    if match:
+        last_page = min(int(match.group(1)), 3)
+
+    def page_exhausted(page_repos):
+        return (since_iso and page_repos
+                and page_repos[-1].get('pushed_at', '') < since_iso)
+
+    page_repos = _loads(response.content)
+    yield from page_repos
+    if page_exhausted(page_repos):
+        return
+
+    if last_page > 1:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(get_page, page) for page in range(2, last_page + 1)]
+            # Harvest in page order so the sort=pushed ordering is preserved
+            for page, future in enumerate(futures, start=2):
+                page_response = future.result()
+                if page_response.status_code != 200:
+                    # Keep whatever was fetched, but make the truncation
+                    # diagnosable instead of silently shortening the scan
+                    print(f"Warning: Could not fetch repos page {page}: {page_response.status_code}")
+                    continue
+                page_repos = _loads(page_response.content)
+                yield from page_repos
+                if page_exhausted(page_repos):
+                    break
+
+def fetch_user_repos(username):
+    """Fetch all repositories for a given username"""
+    return list(iter_user_repos(username))
 
 def fetch_repo_commits(username, repo_name, since_date, until_date):
-    """Fetch commits for a repository within date range"""
+    """Fetch the top 5 commits for a repository within date range"""
     headers = get_github_headers()
-    commits = []
-    page = 1
-    per_page = 100
-    
-    # Convert dates to ISO format
-    since_iso = since_date.strftime('%Y-%m-%dT%H:%M:%SZ')
-    until_iso = until_date.strftime('%Y-%m-%dT%H:%M:%SZ')
-    
-    while True:
-        url = f'https://api.github.com/repos/{username}/{repo_name}/commits'
-        params = {
-            'since': since_iso,
-            'until': until_iso,
-            'per_page': per_page,
-            'page': page,
-            'author': username  # Only get commits by the user
-        }
-        
-        response = requests.get(url, headers=headers, params=params)
-        
-        if response.status_code == 409:
-            # Repository is empty
-            return []
-        elif response.status_code != 200:
-            print(f"Warning: Could not fetch commits for {repo_name}: {response.status_code}")
-            return []
-        
-        page_commits = response.json()
-        if not page_commits:
-            break
-            
-        commits.extend(page_commits)
-        page += 1
-        
-        # Get top 10 commits maximum
-        if len(commits) >= 10:
-            break
-    
-    return commits[:5]  # Return top 5 commits
+
+    url = f'https://api.github.com/repos/{username}/{repo_name}/commits'
+    params = {
+        'since': since_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'until': until_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        # Only 5 commits are ever used, so ask for exactly 5 — one request,
+        # ~20x less JSON to download and decode than a 100-commit page
+        'per_page': 5,
+        'author': username  # Only get commits by the user
+    }
+
+    response = cached_get(url, headers, params=params)
+
+    if response.status_code == 409:
+        # Repository is empty
+        return []
+    elif response.status_code != 200:
+        print(f"Warning: Could not fetch commits for {repo_name}: {response.status_code}")
+        return []
+
+    return _loads(response.content)[:5]
+
+def _truncate_readme(text):
+    """Trim README text to the first 500 characters"""
+    return text[:500] + ("..." if len(text) > 500 else "")
 
 def fetch_repo_readme(username, repo_name):
-    """Fetch README content for a repository"""
+    """Fetch README content for a repository (first ~500 characters)"""
+    # The /readme endpoint resolves whichever README filename the repo uses
+    # in one shot (no filename-guessing 404s), and the raw media type skips
+    # the JSON/base64 envelope. Going through cached_get keeps READMEs
+    # under the ETag and throttle layer: repeat scans replay unchanged
+    # READMEs as free 304s, which beats re-downloading even a partial body.
+    url = f'https://api.github.com/repos/{username}/{repo_name}/readme'
     headers = get_github_headers()
-    
-    # Try different README variations
-    readme_files = ['README.md', 'README.rst', 'README.txt', 'README']
-    
-    for readme_file in readme_files:
-        url = f'https://api.github.com/repos/{username}/{repo_name}/contents/{readme_file}'
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 200:
-            content = response.json()
-            if content.get('encoding') == 'base64':
-                import base64
-                readme_content = base64.b64decode(content['content']).decode('utf-8')
-                # Return first 500 characters
-                return readme_content[:500] + ("..." if len(readme_content) > 500 else "")
-    
-    return None
+    headers['Accept'] = 'application/vnd.github.raw'
+
+    try:
+        response = cached_get(url, headers)
+    except requests.RequestException:
+        return None
+
+    if response.status_code != 200:
+        return None
+
+    return _truncate_readme(response.text)
 
 def filter_repos_by_date(repos, since_date, until_date):
-    """Filter repositories that have been updated within the date range"""
-    filtered_repos = []
-    
-    # Convert input dates to timezone-aware datetime objects
+    """Yield repositories that could have commits within the date range
+
+    A generator so repos flow straight from pagination into the per-repo
+    fetchers without materializing intermediate lists.
+    """
+    # Convert the window bounds once to GitHub's ISO-8601 Zulu format.
+    # ISO-8601 timestamps order lexicographically, so each repo costs two
+    # string compares instead of two datetime.fromisoformat parses.
     if isinstance(since_date, datetime):
         since_dt = since_date.replace(tzinfo=timezone.utc)
     else:
         since_dt = datetime.combine(since_date, datetime.min.time()).replace(tzinfo=timezone.utc)
-    
+
     if isinstance(until_date, datetime):
         until_dt = until_date.replace(tzinfo=timezone.utc)
     else:
         until_dt = datetime.combine(until_date, datetime.max.time()).replace(tzinfo=timezone.utc)
-    
+
+    since_str = since_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    until_str = until_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
     for repo in repos:
-        # Parse repository update date
-        updated_at = datetime.fromisoformat(repo['updated_at'].replace('Z', '+00:00'))
-        
-        # Check if repo was updated in the date range
-        if since_dt <= updated_at <= until_dt:
-            filtered_repos.append(repo)
-    
-    return filtered_repos
+        # If nothing was pushed since the window opened, there can be no
+        # commits in it. Repos arrive sorted by pushed_at descending, so
+        # the first repo pushed before the window means every remaining
+        # one was too — stop instead of scanning the rest
+        pushed_at = repo.get('pushed_at')
+        if pushed_at and pushed_at < since_str:
+            break
+        if not pushed_at:
+            continue
+
+        # Skip forks and archived repos — not the user's own recent work
+        if repo.get('fork') or repo.get('archived'):
+            continue
+
+        if repo['created_at'] > until_str:
+            continue
+
+        yield repo
+
+_GRAPHQL_URL = 'https://api.github.com/graphql'
+
+_USER_ID_QUERY = """
+query($login: String!) {
+  user(login: $login) { id }
+}
+"""
+
+_ACTIVITY_QUERY = """
+query($login: String!, $authorId: ID!, $since: GitTimestamp!, $until: GitTimestamp!, $cursor: String) {
+  user(login: $login) {
+    repositories(first: 100, after: $cursor,
+                 orderBy: {field: PUSHED_AT, direction: DESC},
+                 ownerAffiliations: OWNER, isFork: false) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        url
+        description
+        pushedAt
+        isArchived
+        primaryLanguage { name }
+        stargazerCount
+        repositoryTopics(first: 10) { nodes { topic { name } } }
+        readme: object(expression: "HEAD:README.md") { ... on Blob { text } }
+        defaultBranchRef {
+          target {
+            ... on Commit {
+              history(author: {id: $authorId}, since: $since, until: $until, first: 5) {
+                nodes { messageHeadline }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+def _graphql_headers():
+    """Headers for GraphQL requests (bearer scheme instead of token)"""
+    headers = get_github_headers()
+    headers['Authorization'] = headers['Authorization'].replace('token ', 'bearer ')
+    return headers
+
+@lru_cache(maxsize=32)
+def _graphql_user_id(username):
+    """Resolve a login to its node id for the history author filter
+
+    Cached per username — the id never changes, so repeat scans skip
+    this lookup entirely.
+    """
+    response = get_session().post(_GRAPHQL_URL, headers=_graphql_headers(),
+                                  json={'query': _USER_ID_QUERY, 'variables': {'login': username}})
+
+    if response.status_code != 200:
+        raise GitHubAPIError(f"GitHub GraphQL error: {response.status_code} - {response.text}")
+
+    payload = _loads(response.content)
+    if payload.get('errors'):
+        raise GitHubAPIError(f"GitHub GraphQL error: {payload['errors']}")
+
+    user = payload.get('data', {}).get('user')
+    if user is None:
+        raise GitHubAPIError(f"User '{username}' not found on GitHub")
+
+    return user['id']
+
+def _graphql_node_to_entry(node):
+    """Convert a GraphQL repository node into the activity entry dict shape"""
+    branch_ref = node.get('defaultBranchRef') or {}
+    history = ((branch_ref.get('target') or {}).get('history') or {}).get('nodes') or []
+    commit_messages = [commit['messageHeadline'] for commit in history]
+
+    if not commit_messages:
+        return None
+
+    readme_text = (node.get('readme') or {}).get('text')
+    if readme_text:
+        readme_text = readme_text[:500] + ("..." if len(readme_text) > 500 else "")
+
+    topics = [t['topic']['name'] for t in (node.get('repositoryTopics') or {}).get('nodes', [])]
+
+    return {
+        'repo': node['name'],
+        'url': node['url'],
+        'description': node.get('description', ''),
+        'commits': commit_messages,
+        'commits_count': len(commit_messages),
+        'readme': readme_text,
+        'language': (node.get('primaryLanguage') or {}).get('name'),
+        'stars': node.get('stargazerCount', 0),
+        'topics': topics
+    }
+
+def fetch_activity_graphql(username, start_dt, end_dt):
+    """Fetch activity with a single GraphQL query instead of per-repo REST calls
+
+    One POST returns every repo with its last-5 commits in the window and
+    README text, so the round-trip count is O(1) instead of O(repos).
+    Returns the same list-of-dicts shape as the REST path.
+    """
+    headers = _graphql_headers()
+
+    since_iso = start_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    # Filter history by the user's node id so collaborator commits on the
+    # user's repos don't show up as their activity (the REST path filters
+    # with author=username the same way)
+    author_id = _graphql_user_id(username)
+
+    activity_data = []
+    cursor = None
+
+    while True:
+        variables = {
+            'login': username,
+            'authorId': author_id,
+            'since': since_iso,
+            'until': end_dt.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'cursor': cursor,
+        }
+
+        response = get_session().post(_GRAPHQL_URL, headers=headers,
+                                      json={'query': _ACTIVITY_QUERY, 'variables': variables})
+
+        if response.status_code != 200:
+            raise GitHubAPIError(f"GitHub GraphQL error: {response.status_code} - {response.text}")
+
+        payload = _loads(response.content)
+        if payload.get('errors'):
+            raise GitHubAPIError(f"GitHub GraphQL error: {payload['errors']}")
+
+        user = payload.get('data', {}).get('user')
+        if user is None:
+            raise GitHubAPIError(f"User '{username}' not found on GitHub")
+
+        repositories = user['repositories']
+        exhausted = False
+
+        for node in repositories['nodes']:
+            # Results are ordered by pushedAt descending, so the first repo
+            # pushed before the window means every later one is older too
+            if node.get('pushedAt') and node['pushedAt'] < since_iso:
+                exhausted = True
+                break
+            if node.get('isArchived'):
+                continue
+            entry = _graphql_node_to_entry(node)
+            if entry is not None:
+                activity_data.append(entry)
+
+        page_info = repositories['pageInfo']
+        if exhausted or not page_info['hasNextPage']:
+            break
+        cursor = page_info['endCursor']
+
+    return activity_data
+
+def _commit_message(commit):
+    """First line of a commit's message, with a fallback for odd payloads
+
+    Only malformed-payload errors are caught; network-level exceptions
+    propagate so callers can retry instead of silently losing commits.
+    """
+    try:
+        return commit['commit']['message'].split('\n')[0]
+    except (KeyError, TypeError):
+        return "⚠️ Commit message unavailable"
+
+def _activity_entry(repo, commit_messages, readme_content):
+    """Build an activity entry dict from a REST repo object"""
+    return {
+        'repo': repo['name'],
+        'url': repo['html_url'],
+        'description': repo.get('description', ''),
+        'commits': commit_messages,
+        'commits_count': len(commit_messages),
+        'readme': readme_content,
+        'language': repo.get('language'),
+        'stars': repo.get('stargazers_count', 0),
+        'topics': repo.get('topics', [])
+    }
+
+def _fetch_repos_threaded(username, filtered_repos, start_dt, end_dt):
+    """Thread-pool fetch of commits/READMEs for all repos
+
+    Every commit and README request is submitted up front so the two
+    round-trips per repo overlap across (and within) repos, then the
+    futures are harvested in order to assemble the entries.
+    """
+    activity_data = []
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        tasks = [
+            (repo,
+             executor.submit(fetch_repo_commits, username, repo['name'], start_dt, end_dt),
+             executor.submit(fetch_repo_readme, username, repo['name']))
+            for repo in filtered_repos
+        ]
+
+        for repo, commits_future, readme_future in tasks:
+            try:
+                commits = commits_future.result()
+                readme_content = readme_future.result()
+            except Exception as e:
+                print(f"Error processing repository {repo.get('name', 'unknown')}: {str(e)}")
+                continue
+
+            # Skip repositories with no commits in the date range
+            if not commits:
+                continue
+
+            commit_messages = [_commit_message(commit) for commit in commits]
+            activity_data.append(_activity_entry(repo, commit_messages, readme_content))
+
+    return activity_data
+
+async def _fetch_one_repo_async(client, username, repo, since_iso, until_iso):
+    """Async counterpart of _fetch_one_repo sharing one httpx client"""
+    try:
+        repo_name = repo['name']
+
+        commits_response = await _cached_get_async(
+            client,
+            f'/repos/{username}/{repo_name}/commits',
+            params={
+                'since': since_iso,
+                'until': until_iso,
+                'per_page': 5,
+                'author': username
+            }
+        )
+        if commits_response.status_code != 200:
+            return None
+
+        commits = _loads(commits_response.content)[:5]
+        if not commits:
+            return None
+
+        # Raw media type through the ETag/throttle layer (see fetch_repo_readme)
+        readme_content = None
+        readme_response = await _cached_get_async(
+            client, f'/repos/{username}/{repo_name}/readme',
+            headers={'Accept': 'application/vnd.github.raw'})
+        if readme_response.status_code == 200:
+            readme_content = _truncate_readme(readme_response.text)
+
+        commit_messages = [_commit_message(commit) for commit in commits]
+        return _activity_entry(repo, commit_messages, readme_content)
+
+    except Exception as e:
+        print(f"Error processing repository {repo.get('name', 'unknown')}: {str(e)}")
+        return None
+
+async def _fetch_repos_async(username, filtered_repos, start_dt, end_dt):
+    """Fetch commits/READMEs for all repos concurrently over one connection pool"""
+    since_iso = start_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    until_iso = end_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    async with httpx.AsyncClient(base_url='https://api.github.com',
+                                 headers=get_github_headers(),
+                                 timeout=30) as client:
+        results = await asyncio.gather(*[
+            _fetch_one_repo_async(client, username, repo, since_iso, until_iso)
+            for repo in filtered_repos
+        ])
+
+    return [entry for entry in results if entry is not None]
 
 def fetch_github_activity(username, start_date, end_date):
     """
     Main function to fetch GitHub activity for a user within a date range
-    
+
     Returns:
         List of dictionaries with keys: repo, url, description, commits, readme
     """
     try:
         print(f"Fetching GitHub activity for {username} from {start_date} to {end_date}")
-        
-        # Fetch all user repositories
-        all_repos = fetch_user_repos(username)
-        print(f"Found {len(all_repos)} total repositories")
-        
-        # Filter repositories by date range
-        filtered_repos = filter_repos_by_date(all_repos, start_date, end_date)
-        print(f"Found {len(filtered_repos)} repositories updated in date range")
-        
-        activity_data = []
-        
-        for repo in filtered_repos:
-            try:
-                repo_name = repo['name']
-                print(f"Processing repository: {repo_name}")
-                
-                # Fetch commits for this repository
-                commits = fetch_repo_commits(username, repo_name, 
-                                           datetime.combine(start_date, datetime.min.time()).replace(tzinfo=timezone.utc),
-                                           datetime.combine(end_date, datetime.max.time()).replace(tzinfo=timezone.utc))
-                
-                # Skip repositories with no commits in the date range
-                if not commits:
-                    continue
-                
-                # Fetch README content
-                readme_content = fetch_repo_readme(username, repo_name)
-                
-                # Format commit messages
-                commit_messages = []
-                for commit in commits:
-                    message = commit['commit']['message'].split('\n')[0]  # First line only
-                    commit_messages.append(message)
-                
-                # Create activity data entry
-                activity_entry = {
-                    'repo': repo_name,
-                    'url': repo['html_url'],
-                    'description': repo.get('description', ''),
-                    'commits': commit_messages,
-                    'readme': readme_content,
-                    'language': repo.get('language'),
-                    'stars': repo.get('stargazers_count', 0),
-                    'topics': repo.get('topics', [])
-                }
-                
-                activity_data.append(activity_entry)
-                print(f"Added {repo_name} with {len(commit_messages)} commits")
-                
-            except Exception as e:
-                print(f"Error processing repository {repo.get('name', 'unknown')}: {str(e)}")
-                continue
-        
+
+        start_dt = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=timezone.utc)
+        end_dt = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=timezone.utc)
+
+        # Try the single-query GraphQL path first; it collapses the repo
+        # list, commit, and README round-trips into one POST. Fall back to
+        # the REST path if the query fails (e.g. token lacks GraphQL scope).
+        try:
+            activity_data = fetch_activity_graphql(username, start_dt, end_dt)
+            print(f"Successfully processed {len(activity_data)} repositories (GraphQL)")
+            return activity_data
+        except GitHubAPIError as e:
+            print(f"GraphQL fetch failed, falling back to REST: {e}")
+
+        # Stream repos page by page through the date filter; per-repo
+        # fetching starts as soon as page 1 arrives instead of waiting for
+        # the full repo list to materialize
+        since_iso = start_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+        filtered_repos = filter_repos_by_date(iter_user_repos(username, since_iso=since_iso),
+                                              start_date, end_date)
+
+        # Each repo needs its own commit + README round-trips, all independent
+        # network I/O. Prefer the async httpx client (no per-request thread
+        # overhead, shared connection pool); fall back to a thread pool when
+        # httpx isn't installed.
+        if httpx is not None:
+            activity_data = asyncio.run(_fetch_repos_async(username, filtered_repos, start_dt, end_dt))
+        else:
+            activity_data = _fetch_repos_threaded(username, filtered_repos, start_dt, end_dt)
+
         print(f"Successfully processed {len(activity_data)} repositories")
         return activity_data
         
@@ -219,6 +762,7 @@ def fetch_github_activity(username, start_date, end_date):
         raise e
     except Exception as e:
         print(f"Unexpected error in fetch_github_activity: {str(e)}")
+        import traceback
         print(traceback.format_exc())
         raise GitHubAPIError(f"Unexpected error: {str(e)}")
 
@@ -226,10 +770,10 @@ def validate_github_token():
     """Validate that the GitHub token is working"""
     try:
         headers = get_github_headers()
-        response = requests.get('https://api.github.com/user', headers=headers)
+        response = get_session().get('https://api.github.com/user', headers=headers)
         
         if response.status_code == 200:
-            user_data = response.json()
+            user_data = _loads(response.content)
             return True, user_data.get('login', 'Unknown')
         else:
             return False, f"Invalid token: {response.status_code}"
@@ -1,66 +1,68 @@
-import subprocess
 import json
-import sys
-from datetime import datetime
-import traceback
+import re
+import threading
+import requests
+from functools import lru_cache
+
+# Ollama's local HTTP server; kept resident across calls unlike the CLI
+OLLAMA_URL = 'http://localhost:11434'
+
+@lru_cache(maxsize=1)
+def _ollama_tags():
+    """Fetch (and cache) the server's model list from /api/tags
+
+    One HTTP GET instead of forking an `ollama list` subprocess per call.
+    lru_cache only caches successful responses — exceptions propagate and
+    are retried on the next call, so a late-started server is picked up.
+    """
+    response = requests.get(f'{OLLAMA_URL}/api/tags', timeout=10)
+    response.raise_for_status()
+    return response.json()
 
 def check_ollama_available():
     """Check if Ollama is installed and running"""
     try:
-        result = subprocess.run(['ollama', 'list'], 
-                              capture_output=True, text=True, timeout=10)
-        return result.returncode == 0, result.stdout
-    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        _ollama_tags()
+        return True, "Ollama server is running"
+    except requests.RequestException as e:
         return False, str(e)
 
 def get_available_models():
     """Get list of available Ollama models"""
     try:
-        result = subprocess.run(['ollama', 'list'], 
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            lines = result.stdout.strip().split('\n')[1:]  # Skip header
-            models = []
-            for line in lines:
-                if line.strip():
-                    model_name = line.split()[0]
-                    models.append(model_name)
-            return models
-        return []
-    except Exception:
+        return [model['name'] for model in _ollama_tags().get('models', [])]
+    except (requests.RequestException, ValueError):
         return []
-    
+
 def call_ollama(prompt: str, model: str = "mistral") -> str:
-    """Calls the local Ollama model with a prompt and returns the response."""
+    """Calls the local Ollama model with a prompt and returns the response.
+
+    Goes through the resident HTTP server instead of forking an
+    `ollama run` child per prompt, avoiding process-spawn and
+    stdout-buffering overhead on every call.
+    """
     try:
-        result = subprocess.run(
-            ["ollama", "run", model, prompt],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        return f"❌ Ollama Error: {e.stderr.strip()}"
+        return "".join(call_ollama_stream(prompt, model)).strip()
+    except (requests.RequestException, ValueError) as e:
+        return f"❌ Ollama Error: {str(e)}"
 
 def format_project_data(project_data):
     """Format project data for the LLM prompt"""
     formatted = []
     for item in project_data:
-        project_info = f"**{item['repo']}**"
+        parts = [f"**{item['repo']}**"]
         if item.get('readme'):
-            project_info += f" - {item['readme']}"
-        
+            parts.append(f" - {item['readme']}")
+
         if item.get('language'):
-            project_info += f" (Built with {item['language']})"
-        
+            parts.append(f" (Built with {item['language']})")
+
         if item.get('commits'):
-            project_info += f"\nKey commits: {', '.join(item['commits'][:3])}"
-        
-        project_info += f"\nGitHub: {item['url']}"
-        formatted.append(project_info)
-    
+            parts.append(f"\nKey commits: {', '.join(item['commits'][:3])}")
+
+        parts.append(f"\nGitHub: {item['url']}")
+        formatted.append(''.join(parts))
+
     return formatted
 
 def create_linkedin_prompt(spotlight_projects, other_projects, start_date, end_date):
@@ -70,9 +72,9 @@ def create_linkedin_prompt(spotlight_projects, other_projects, start_date, end_d
     date_range = f"{start_date.strftime('%B %d')} to {end_date.strftime('%B %d, %Y')}"
     
     # Format project data
-    spotlight_formatted = format_project_data(spotlight_projects)
-    other_formatted = format_project_data(other_projects)
-    
+    spotlight_text = '\n'.join(format_project_data(spotlight_projects))
+    other_text = '\n'.join(format_project_data(other_projects)) or "None"
+
     # Create the prompt
     prompt = f"""You are a professional LinkedIn content creator. Generate a human-sounding, engaging LinkedIn post about recent GitHub activity.
 
@@ -82,10 +84,10 @@ CONTEXT:
 - Supporting projects: {len(other_projects)} additional projects to mention briefly, mention all the projects but keep it concise.
 
 SPOTLIGHT PROJECTS:
-{chr(10).join(spotlight_formatted)}
+{spotlight_text}
 
 OTHER PROJECTS:
-{chr(10).join(other_formatted) if other_formatted else "None"}
+{other_text}
 
 REQUIREMENTS:
 1. Start with an engaging title using ONE emoji at the beginning and end
@@ -124,47 +126,76 @@ Generate the LinkedIn post now:"""
 
     return prompt
 
-def call_ollama_generate(prompt, model='llama3'):
-    """Call Ollama to generate text based on the prompt"""
-    try:
-        # Prepare the command
-        cmd = ['ollama', 'run', model, '--prompt', prompt]
-        
-        # Run Ollama
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        
-        if result.returncode == 0:
-            return result.stdout.strip()
+def preload_model(model='llama3'):
+    """Ask Ollama to load the model into memory ahead of generation
+
+    An empty prompt makes /api/generate load the model and return without
+    generating, so a warm-up kicked off right after the GitHub fetch hides
+    the model's multi-second cold start behind the user's project-selection
+    step. Best-effort and fire-and-forget.
+    """
+    def _warm():
+        try:
+            requests.post(f'{OLLAMA_URL}/api/generate',
+                          json={'model': model, 'prompt': '', 'keep_alive': '10m'},
+                          timeout=60)
+        except requests.RequestException:
+            pass
+
+    threading.Thread(target=_warm, daemon=True).start()
+
+def call_ollama_stream(prompt, model='llama3'):
+    """Yield response chunks from Ollama's streaming /api/generate endpoint
+
+    Streaming makes time-to-first-token the perceived latency instead of
+    full-generation time; callers join the chunks for the final text.
+    """
+    with requests.post(f'{OLLAMA_URL}/api/generate',
+                       json={'model': model, 'prompt': prompt, 'stream': True},
+                       stream=True, timeout=120) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get('response'):
+                yield chunk['response']
+            if chunk.get('done'):
+                break
+
+def generate_post_with_ollama_stream(spotlight_projects, other_projects, start_date, end_date, model='llama3'):
+    """Streaming variant of generate_post_with_ollama
+
+    Yields post chunks as Ollama produces them (e.g. for st.write_stream).
+    Raises an Exception if Ollama or the requested model is unavailable.
+    """
+    # Check if Ollama is available
+    is_available, message = check_ollama_available()
+    if not is_available:
+        raise Exception(f"Ollama is not available: {message}")
+
+    # Get available models
+    available_models = get_available_models()
+    if model not in available_models:
+        if available_models:
+            model = available_models[0]  # Use first available model
         else:
-            error_msg = result.stderr if result.stderr else "Unknown error"
-            raise Exception(f"Ollama error: {error_msg}")
-            
-    except subprocess.TimeoutExpired:
-        raise Exception("Ollama request timed out. The model might be taking too long to respond.")
-    except FileNotFoundError:
-        raise Exception("Ollama not found. Please install Ollama and make sure it's in your PATH.")
-    except Exception as e:
-        raise Exception(f"Error calling Ollama: {str(e)}")
+            raise Exception("No Ollama models found. Please install a model first (e.g., 'ollama pull llama3')")
+
+    prompt = create_linkedin_prompt(spotlight_projects, other_projects, start_date, end_date)
+    yield from call_ollama_stream(prompt, model)
+
+# Lines carrying LLM artifacts (code fences, separators, preambles), and
+# runs of 3+ newlines — both compiled once at import
+_SKIP_LINE_RE = re.compile(r"^[^\n]*(?:```|---|Here is|Here's)[^\n]*\n?", re.M)
+_EXTRA_BLANK_RE = re.compile(r'\n{3,}')
 
 def clean_generated_post(raw_output):
     """Clean and format the generated post"""
-    # Remove any system messages or artifacts
-    lines = raw_output.split('\n')
-    cleaned_lines = []
-    skip_patterns = ['```', '---', 'Here is', 'Here\'s']
-    
-    for line in lines:
-        line = line.strip()
-        if line and not any(pattern in line for pattern in skip_patterns):
-            cleaned_lines.append(line)
-    
-    # Join lines and clean up extra spaces
-    cleaned_post = '\n'.join(cleaned_lines)
-    
-    # Remove excessive line breaks
-    while '\n\n\n' in cleaned_post:
-        cleaned_post = cleaned_post.replace('\n\n\n', '\n\n')
-    
+    # Two C-level regex passes replace the per-line Python loop and the
+    # quadratic replace-while-found blank-line squashing
+    cleaned_post = _SKIP_LINE_RE.sub('', raw_output)
+    cleaned_post = _EXTRA_BLANK_RE.sub('\n\n', cleaned_post)
     return cleaned_post.strip()
 
 def generate_post_with_ollama(spotlight_projects, other_projects, start_date, end_date, model='llama3'):
@@ -214,6 +245,7 @@ def generate_post_with_ollama(spotlight_projects, other_projects, start_date, en
         
     except Exception as e:
         print(f"Error generating post: {str(e)}")
+        import traceback
         print(traceback.format_exc())
         return None
 